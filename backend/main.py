@@ -17,34 +17,74 @@ import io
 import uuid
 import logging
 import asyncio
+import functools
+import threading
+import time
+import importlib.util
+import shutil
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import List, Optional, AsyncGenerator
+from typing import List, Optional, Tuple, AsyncGenerator
 from dotenv import load_dotenv
 
 from fastapi import FastAPI, UploadFile, File, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-import json
+from filelock import FileLock
+import orjson
 
 # LangChain imports
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 from langchain_community.vectorstores import FAISS
-from langchain_community.embeddings import HuggingFaceEmbeddings
+from langchain_community.vectorstores.utils import DistanceStrategy
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_core.embeddings import Embeddings
+from sentence_transformers import SentenceTransformer
+import torch
+import faiss
+import numpy as np
 
 # File parsing
 import pandas as pd
-from pypdf import PdfReader
+import pypdfium2 as pdfium
+from pptx import Presentation
+
+# Rust-based Excel reader (much faster than openpyxl, and also reads legacy .xls)
+if importlib.util.find_spec("python_calamine") is not None:
+    EXCEL_ENGINE = "calamine"
+else:
+    EXCEL_ENGINE = None  # Let pandas pick openpyxl/xlrd
+    logging.warning("python-calamine not available - will use openpyxl for Excel")
 
 # Re-ranking
 try:
     from flashrank import Ranker, RerankRequest
+    from flashrank.Config import model_file_map
+    from tokenizers import Tokenizer
     FLASHRANK_AVAILABLE = True
 except ImportError:
     FLASHRANK_AVAILABLE = False
     logging.warning("FlashRank not available - will use basic ranking")
 
+# ONNX Runtime (FlashRank sessions and int8 embeddings on CPU, CUDA when present)
+try:
+    import onnxruntime as ort
+except ImportError:
+    ort = None
+
+try:
+    from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTOptimizer, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoOptimizationConfig, AutoQuantizationConfig
+    from transformers import AutoTokenizer
+    ONNX_AVAILABLE = True
+except ImportError:
+    ONNX_AVAILABLE = False
+    logging.warning("Optimum/ONNX Runtime not available - will use PyTorch embeddings")
+
 # Google Gemini
 import google.generativeai as genai
 
@@ -59,11 +99,19 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Per-worker startup and shutdown; the `python main.py` supervisor never runs this"""
+    initialize_components()
+    yield
+    await flush_on_shutdown()
+
 # Initialize FastAPI
 app = FastAPI(
     title="VeriSearch RAG API",
     version="2.0.0",
-    description="Enterprise RAG System with Hybrid Search & Re-Ranking"
+    description="Enterprise RAG System with Hybrid Search & Re-Ranking",
+    lifespan=lifespan
 )
 
 # CORS configuration
@@ -85,8 +133,12 @@ async def log_requests(request: Request, call_next):
     logger.info(f"📤 {request.method} {request.url.path} - {response.status_code} - {duration:.2f}s")
     return response
 
-# Initialize components
-logger.info("🚀 Initializing RAG components...")
+# Worker processes: uvicorn's own WEB_CONCURRENCY setting, so `python main.py`
+# and `uvicorn main:app` agree with the shared-index mode below
+WORKERS = int(os.getenv("WEB_CONCURRENCY", 1))
+THREADS_PER_WORKER = max(1, (os.cpu_count() or 1) // WORKERS)  # Inference threads per model
+
+# Initialize components (models load per worker in initialize_components, not in the supervisor)
 
 # 1. Text Splitter (Chunking)
 text_splitter = RecursiveCharacterTextSplitter(
@@ -97,57 +149,592 @@ text_splitter = RecursiveCharacterTextSplitter(
 )
 
 # 2. Local Embeddings (HuggingFace - No Rate Limits!)
-logger.info("📦 Loading HuggingFace embeddings model...")
-embeddings = HuggingFaceEmbeddings(
-    model_name="sentence-transformers/all-MiniLM-L6-v2",
-    model_kwargs={'device': 'cpu'},
-    encode_kwargs={'normalize_embeddings': True}
-)
-logger.info("✅ Embeddings model loaded")
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+EMBEDDING_DIM = 384          # all-MiniLM-L6-v2 output size
+EMBEDDING_BATCH_SIZE = 128
+EMBEDDING_MAX_LENGTH = 256   # MiniLM-L6 max_seq_length
+ONNX_MODEL_DIR = "./minilm-onnx"
+RERANK_CACHE_DIR = "./.cache"
+
+# Workers start together, so only one exports or downloads models at a time
+model_setup_lock = FileLock("./.model_setup.lock")
+
+class MiniLMEmbeddings(Embeddings):
+    """SentenceTransformer embeddings encoded in large, length-sorted batches"""
+    
+    def __init__(self, model_name: str, device: str = 'cpu', batch_size: int = EMBEDDING_BATCH_SIZE):
+        self.model = SentenceTransformer(model_name, device=device)
+        self.batch_size = batch_size
+    
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Encode texts into normalized float32 vectors in one call"""
+        # SentenceTransformer sorts the whole input by length before batching
+        # and restores the original order, so a single call minimizes padding
+        return self.model.encode(
+            texts,
+            batch_size=self.batch_size,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+            show_progress_bar=False
+        )
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.encode(texts).tolist()
+    
+    def embed_query(self, text: str) -> List[float]:
+        return self.encode([text])[0].tolist()
+
+class OnnxMiniLMEmbeddings(MiniLMEmbeddings):
+    """MiniLM served by ONNX Runtime with mean pooling and L2 normalization"""
+    
+    def __init__(self, model_dir: str, file_name: str, provider: str, batch_size: int = EMBEDDING_BATCH_SIZE):
+        sess_options = ort.SessionOptions()
+        sess_options.intra_op_num_threads = THREADS_PER_WORKER
+        # IO binding (on by default for CUDA) rejects the numpy batches encode() feeds
+        self.model = ORTModelForFeatureExtraction.from_pretrained(
+            model_dir, file_name=file_name, provider=provider, session_options=sess_options, use_io_binding=False
+        )
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.batch_size = batch_size
+    
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Encode texts into normalized float32 vectors in length-sorted batches"""
+        order = np.argsort([-len(text) for text in texts], kind="stable")
+        vectors = np.empty((len(texts), EMBEDDING_DIM), dtype=np.float32)
+        
+        for start in range(0, len(texts), self.batch_size):
+            batch_idx = order[start:start + self.batch_size]
+            inputs = self.tokenizer(
+                [texts[i] for i in batch_idx],
+                padding=True,
+                truncation=True,
+                max_length=EMBEDDING_MAX_LENGTH,
+                return_tensors="np"
+            )
+            hidden = self.model(**inputs).last_hidden_state
+            
+            # Mean pooling over real tokens, matching sentence-transformers
+            mask = inputs["attention_mask"][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            norms = np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            vectors[batch_idx] = pooled / norms
+        
+        return vectors
+
+ONNX_OPTIMIZED_FILE = "model_optimized.onnx"
+ONNX_QUANTIZED_FILE = "model_optimized_quantized.onnx"
+
+def export_onnx_embeddings(model_name: str):
+    """Export, optimize and int8-quantize MiniLM into a temp dir, then move it into place"""
+    logger.info("🔧 Exporting embeddings model to ONNX...")
+    tmp_dir = ONNX_MODEL_DIR + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)  # Left behind by a killed export
+    
+    model = ORTModelForFeatureExtraction.from_pretrained(model_name, export=True)
+    model.save_pretrained(tmp_dir)
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(tmp_dir)
+    
+    optimizer = ORTOptimizer.from_pretrained(model)
+    optimizer.optimize(save_dir=tmp_dir, optimization_config=AutoOptimizationConfig.O3())
+    
+    # Dynamic int8 weight quantization (activations stay fp32)
+    quantizer = ORTQuantizer.from_pretrained(tmp_dir, file_name=ONNX_OPTIMIZED_FILE)
+    quantizer.quantize(
+        save_dir=tmp_dir,
+        quantization_config=AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+    )
+    
+    # The directory only ever appears complete; drop an incomplete one from earlier versions
+    shutil.rmtree(ONNX_MODEL_DIR, ignore_errors=True)
+    os.replace(tmp_dir, ONNX_MODEL_DIR)
+
+def load_onnx_embeddings(model_name: str) -> OnnxMiniLMEmbeddings:
+    """Export MiniLM to ONNX on first run, then load it"""
+    with model_setup_lock:
+        if not os.path.exists(os.path.join(ONNX_MODEL_DIR, ONNX_QUANTIZED_FILE)):
+            export_onnx_embeddings(model_name)
+    
+    # int8 dynamic quantization only has CPU kernels, so GPUs get the fp32 graph
+    if "CUDAExecutionProvider" in ort.get_available_providers():
+        logger.info("⚡ Using ONNX Runtime embeddings on CUDA")
+        return OnnxMiniLMEmbeddings(ONNX_MODEL_DIR, ONNX_OPTIMIZED_FILE, "CUDAExecutionProvider")
+    logger.info("⚡ Using int8 ONNX Runtime embeddings on CPU")
+    return OnnxMiniLMEmbeddings(ONNX_MODEL_DIR, ONNX_QUANTIZED_FILE, "CPUExecutionProvider")
+
+def load_embeddings() -> MiniLMEmbeddings:
+    """Prefer int8 ONNX Runtime embeddings, falling back to PyTorch"""
+    logger.info("📦 Loading HuggingFace embeddings model...")
+    model = None
+    if ONNX_AVAILABLE:
+        try:
+            model = load_onnx_embeddings(EMBEDDING_MODEL)
+        except Exception as e:
+            logger.warning(f"⚠️ ONNX embeddings unavailable, falling back to PyTorch: {str(e)}")
+    if model is None:
+        model = MiniLMEmbeddings(EMBEDDING_MODEL, device='cuda' if torch.cuda.is_available() else 'cpu')
+    logger.info("✅ Embeddings model loaded")
+    return model
+
+embeddings: Optional[MiniLMEmbeddings] = None
 
 # 3. FlashRank Re-Ranker (Accuracy Boost)
-if FLASHRANK_AVAILABLE:
+RETRIEVAL_K = 50   # Wide FAISS retrieval; rerank latency dominates, not search
+RERANK_TOP_N = 5   # Chunks kept for the LLM context
+RERANK_MODEL = "ms-marco-MiniLM-L-12-v2"
+RERANK_MODEL_MAX_LENGTH = 512  # Position embeddings of the cross-encoder
+RERANK_QUERY_TOKENS = 64       # Allowance for the query half of each pair
+RERANK_LENGTH_SAMPLE = 2000    # Indexed chunks tokenized when measuring the cap (at most)
+RERANK_RETUNE_GROWTH = 2       # Re-measure the cap each time the corpus doubles
+
+def download_ranker_model():
+    """Download and unzip the FlashRank model into a temp cache, then move it into place"""
+    model_dir = os.path.join(RERANK_CACHE_DIR, RERANK_MODEL)
+    if os.path.exists(model_dir):
+        return
+    tmp_cache = RERANK_CACHE_DIR + ".tmp"
+    shutil.rmtree(tmp_cache, ignore_errors=True)  # Left behind by a killed download
+    Ranker(model_name=RERANK_MODEL, cache_dir=tmp_cache)  # FlashRank downloads on construction
+    os.makedirs(RERANK_CACHE_DIR, exist_ok=True)
+    os.replace(os.path.join(tmp_cache, RERANK_MODEL), model_dir)
+    shutil.rmtree(tmp_cache, ignore_errors=True)
+
+def load_ranker() -> "Ranker":
+    """FlashRank cross-encoder on a tuned ONNX Runtime session"""
     logger.info("🎯 Initializing FlashRank re-ranker...")
-    ranker = Ranker(model_name="ms-marco-MiniLM-L-12-v2", cache_dir="./.cache")
+    # FlashRank accepts any existing model dir, so never let it see a half-unzipped one
+    with model_setup_lock:
+        download_ranker_model()
+    model = Ranker(model_name=RERANK_MODEL, cache_dir=RERANK_CACHE_DIR, max_length=RERANK_MODEL_MAX_LENGTH)
+    
+    # FlashRank ships this model int8-quantized already; rebuild its session with this
+    # worker's share of the cores and full graph optimization (int8 kernels are CPU-only)
+    sess_options = ort.SessionOptions()
+    sess_options.intra_op_num_threads = THREADS_PER_WORKER
+    sess_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    model.session = ort.InferenceSession(
+        str(model.model_dir / model_file_map[RERANK_MODEL]),
+        sess_options,
+        providers=["CPUExecutionProvider"]
+    )
+    
+    # Warm up so the first chat request doesn't pay for session initialization
+    model.rerank(RerankRequest(query="warmup", passages=[{"id": 0, "text": "warmup"}]))
     logger.info("✅ FlashRank initialized")
-else:
-    ranker = None
+    return model
+
+ranker: Optional["Ranker"] = None
 
 # 4. FAISS Vector Store (Global - with persistence)
+HNSW_M = 32                  # Graph neighbours per node
+HNSW_EF_CONSTRUCTION = 200   # Build-time candidate list size
+HNSW_EF_SEARCH = 64          # Query-time candidate list size (must be >= RETRIEVAL_K)
+IVFPQ_THRESHOLD = 50_000     # Switch from HNSW to compressed IVF+PQ above this many chunks
+IVFPQ_MAX_LISTS = 4096       # Upper bound on IVF coarse clusters
+IVFPQ_NPROBE = 16            # Clusters scanned per query
+
 vector_store: Optional[FAISS] = None
+vector_store_lock = asyncio.Lock()  # FAISS add/search/save are not safe to interleave
+
+def distance_strategy_for(index) -> DistanceStrategy:
+    """Pick LangChain's score interpretation from the raw FAISS metric"""
+    if index.metric_type == faiss.METRIC_INNER_PRODUCT:
+        return DistanceStrategy.MAX_INNER_PRODUCT
+    return DistanceStrategy.EUCLIDEAN_DISTANCE
+
+def create_vector_store() -> FAISS:
+    """Create an empty FAISS store backed by an inner-product HNSW graph over fp16 vectors"""
+    # fp16 storage halves memory and bandwidth with no measurable recall loss on normalized MiniLM vectors
+    index = faiss.IndexHNSWSQ(EMBEDDING_DIM, faiss.ScalarQuantizer.QT_fp16, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+    index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+    return FAISS(
+        embedding_function=embeddings,
+        index=index,
+        docstore=InMemoryDocstore(),
+        index_to_docstore_id={},
+        distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT
+    )
+
+def needs_compression(index) -> bool:
+    """True once the corpus outgrows in-memory float vectors"""
+    return not isinstance(index, faiss.IndexIVF) and index.ntotal > IVFPQ_THRESHOLD
+
+def build_ivfpq_index(xb: np.ndarray):
+    """Train and fill an IVF+PQ index from a snapshot of the stored vectors"""
+    # ~39 training points per cluster keeps k-means well conditioned
+    nlist = min(IVFPQ_MAX_LISTS, len(xb) // 39)
+    logger.info(f"🗜️ Compressing {len(xb)} chunks into IVF{nlist},PQ32x8 index...")
+    ivfpq = faiss.index_factory(EMBEDDING_DIM, f"IVF{nlist},PQ32x8", faiss.METRIC_INNER_PRODUCT)
+    ivfpq.train(xb)
+    ivfpq.add(xb)
+    return ivfpq
+
+def swap_in_compressed_index(ivfpq, snapshot_rows: int) -> bool:
+    """Add rows ingested during the build, then replace the live index (caller holds the locks)"""
+    index = vector_store.index
+    if isinstance(index, faiss.IndexIVF):
+        return False  # Another worker already compressed it
+    if index.ntotal > snapshot_rows:
+        ivfpq.add(index.reconstruct_n(snapshot_rows, index.ntotal - snapshot_rows))
+    
+    # Row order is preserved, so index_to_docstore_id stays valid
+    vector_store.index = ivfpq
+    vector_store.distance_strategy = DistanceStrategy.MAX_INNER_PRODUCT
+    return True
+
+def configure_search(index):
+    """Apply query-time search parameters, which are not persisted with every index type"""
+    if isinstance(index, faiss.IndexIVF):
+        index.nprobe = IVFPQ_NPROBE
+    elif isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = HNSW_EF_SEARCH
+
+def add_to_vector_store(texts: List[str], vectors: np.ndarray, metadatas: List[dict]):
+    """Append pre-computed embeddings, creating the store on first use"""
+    global vector_store, docstore_log_offset
+    if vector_store is None:
+        logger.info("🔨 Creating new FAISS index...")
+        vector_store = create_vector_store()
+    else:
+        logger.info("➕ Adding to existing FAISS index...")
+    
+    # Log chunks before indexing them so the docstore log is never behind the index
+    ids = [str(uuid.uuid4()) for _ in texts]
+    log_size = os.path.getsize(DOCSTORE_LOG_PATH) if os.path.exists(DOCSTORE_LOG_PATH) else 0
+    try:
+        append_to_docstore_log(ids, texts, metadatas)
+        index_vectors(ids, texts, vectors, metadatas)
+    except Exception:
+        # Rows are matched to log lines by position, so orphaned lines would shift every later row
+        truncate_docstore_log(log_size)
+        raise
+    docstore_log_offset = os.path.getsize(DOCSTORE_LOG_PATH)  # Our own entries are already mapped
+
+def index_vectors(ids: List[str], texts: List[str], vectors: np.ndarray, metadatas: List[dict]):
+    """Add one contiguous float32 batch to FAISS and register its chunks"""
+    # Straight to the raw index - add_embeddings would round-trip the matrix through Python lists
+    xb = np.ascontiguousarray(vectors, dtype=np.float32)
+    if not vector_store.index.is_trained:
+        vector_store.index.train(xb)  # No-op for fp16, kept for the API contract
+    start = vector_store.index.ntotal
+    vector_store.index.add(xb)
+    
+    vector_store.docstore.add({
+        id_: Document(id=id_, page_content=text, metadata=metadata)
+        for id_, text, metadata in zip(ids, texts, metadatas)
+    })
+    vector_store.index_to_docstore_id.update(zip(range(start, start + len(ids)), ids))
+
+# Persistence layout:
+# - index.<generation>.faiss: FAISS index snapshots, each written once under a new
+#   name (debounced with a single worker). Other workers may have an older one
+#   mapped, and Windows cannot replace a mapped file, so nothing is overwritten.
+# - docstore.jsonl: append-only chunk log, one line per index row in insertion order
+INDEX_DIR = "faiss_index"
+LEGACY_INDEX_PATH = os.path.join(INDEX_DIR, "index.faiss")  # Single-file index of earlier versions
+DOCSTORE_LOG_PATH = os.path.join(INDEX_DIR, "docstore.jsonl")
+INDEX_GENERATIONS_KEPT = 2   # Newest snapshots kept for workers still reloading
+SAVE_DEBOUNCE_SECONDS = 10
+
+# Multi-process serving: each Uvicorn worker keeps its own store and every write
+# is serialized across processes by a file lock, whatever WORKERS says (it can't
+# see `uvicorn --workers`). With declared workers, writes are also flushed
+# immediately and workers map the latest snapshot read-only (so its pages are
+# shared) when it changes.
+SHARED_INDEX = WORKERS > 1
+MMAP_INDEX = SHARED_INDEX
+os.makedirs(INDEX_DIR, exist_ok=True)
+writer_lock = FileLock(os.path.join(INDEX_DIR, ".writer.lock"))
+
+index_dirty = False
+save_task: Optional[asyncio.Task] = None
+loaded_index_generation: Optional[int] = None  # Snapshot currently in memory
+index_is_mmap = False                          # mmap-backed indexes are read-only
+docstore_log_offset = 0                    # Bytes of docstore.jsonl mapped into the docstore
+
+def append_to_docstore_log(ids: List[str], texts: List[str], metadatas: List[dict]):
+    """Append new chunks to the docstore log - O(new chunks), not O(corpus)"""
+    os.makedirs(INDEX_DIR, exist_ok=True)
+    with open(DOCSTORE_LOG_PATH, "ab") as f:
+        f.writelines(
+            orjson.dumps({"id": id_, "text": text, "metadata": metadata}) + b"\n"
+            for id_, text, metadata in zip(ids, texts, metadatas)
+        )
+
+def truncate_docstore_log(size: int):
+    """Drop log lines past `size` bytes, written for a batch that never reached the index"""
+    with open(DOCSTORE_LOG_PATH, "r+b") as f:
+        f.truncate(size)
+
+def read_docstore_log(offset: int = 0, limit: Optional[int] = None) -> Tuple[List[dict], int]:
+    """Stream up to `limit` complete log entries from a byte offset; returns them and the new offset"""
+    entries = []
+    with open(DOCSTORE_LOG_PATH, "rb") as f:
+        f.seek(offset)
+        while limit is None or len(entries) < limit:
+            line = f.readline()
+            if not line.endswith(b"\n"):
+                break  # End of file, or a line another worker is still appending
+            offset += len(line)
+            if line.strip():
+                entries.append(orjson.loads(line))
+    return entries, offset
+
+def index_path(generation: int) -> str:
+    """Path of an index snapshot; generation 0 is the legacy index.faiss"""
+    if generation == 0:
+        return LEGACY_INDEX_PATH
+    return os.path.join(INDEX_DIR, f"index.{generation}.faiss")
+
+def index_generations() -> List[int]:
+    """Generations of the saved index snapshots, oldest first"""
+    generations = []
+    for name in os.listdir(INDEX_DIR):
+        parts = name.split(".")
+        if name == "index.faiss":
+            generations.append(0)
+        elif len(parts) == 3 and parts[0] == "index" and parts[1].isdigit() and parts[2] == "faiss":
+            generations.append(int(parts[1]))
+    return sorted(generations)
+
+def latest_index_generation() -> Optional[int]:
+    """Newest saved snapshot, or None if the index was never written"""
+    generations = index_generations()
+    return generations[-1] if generations else None
+
+def prune_index_generations():
+    """Delete all but the newest snapshots; files still mapped on Windows are retried next save"""
+    for generation in index_generations()[:-INDEX_GENERATIONS_KEPT]:
+        try:
+            os.remove(index_path(generation))
+        except OSError:
+            pass
+
+def read_index(path: str, mmap: bool):
+    """Read an index snapshot, memory-mapping it when requested and supported"""
+    if mmap:
+        try:
+            return faiss.read_index(path, faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY)
+        except (AttributeError, RuntimeError) as e:
+            logger.warning(f"⚠️ Memory-mapped index load failed, reading into memory: {str(e)}")
+    return faiss.read_index(path)
 
 def save_vector_store():
     """Save FAISS index to disk"""
-    global vector_store
+    global vector_store, loaded_index_generation
     if vector_store:
         try:
-            vector_store.save_local("faiss_index")
+            os.makedirs(INDEX_DIR, exist_ok=True)
+            # Write to a temp file and rename it into a new generation so readers never see a partial index
+            generation = max(time.time_ns(), (latest_index_generation() or 0) + 1)
+            tmp_path = index_path(generation) + ".tmp"
+            faiss.write_index(vector_store.index, tmp_path)
+            os.replace(tmp_path, index_path(generation))
+            loaded_index_generation = generation
+            prune_index_generations()
             logger.info("💾 FAISS index saved to disk")
         except Exception as e:
             logger.error(f"❌ Failed to save FAISS index: {str(e)}")
 
-def load_vector_store():
-    """Load FAISS index from disk"""
-    global vector_store
+async def flush_vector_store():
+    """Write the index once per debounce window until no changes are pending"""
+    global index_dirty
+    while index_dirty:
+        await asyncio.sleep(SAVE_DEBOUNCE_SECONDS)
+        async with vector_store_lock:
+            index_dirty = False
+            await run_in_threadpool(flush_to_disk)
+
+def flush_to_disk():
+    """Save under the writer lock, first picking up a longer snapshot from another process"""
+    with writer_lock:
+        refresh_vector_store(writable=True)
+        save_vector_store()
+
+def schedule_save():
+    """Mark the index dirty and make sure a flush is pending"""
+    global index_dirty, save_task
+    index_dirty = True
+    if save_task is None or save_task.done():
+        save_task = asyncio.create_task(flush_vector_store())
+
+def load_vector_store(mmap: bool = False):
+    """Load FAISS index from disk, mapping only docstore log entries not seen yet"""
+    global vector_store, loaded_index_generation, index_is_mmap, docstore_log_offset
     try:
-        if os.path.exists("faiss_index"):
+        if os.path.exists(DOCSTORE_LOG_PATH):
             logger.info("📂 Loading existing FAISS index...")
-            vector_store = FAISS.load_local("faiss_index", embeddings, allow_dangerous_deserialization=True)
+            generation = latest_index_generation()
+            index = read_index(index_path(generation), mmap) if generation is not None else create_vector_store().index
+            
+            if vector_store is not None and not index_is_mmap and index.ntotal < vector_store.index.ntotal:
+                # Saved by a process that had not caught up yet; ours is the longer prefix of the log
+                index, mmap = vector_store.index, False
+            
+            if vector_store is None:
+                vector_store = FAISS(
+                    embedding_function=embeddings,
+                    index=index,
+                    docstore=InMemoryDocstore(),
+                    index_to_docstore_id={},
+                    distance_strategy=distance_strategy_for(index)
+                )
+                docstore_log_offset = 0
+            
+            # Map new log entries onto the rows this index actually contains
+            start = len(vector_store.index_to_docstore_id)
+            indexed, docstore_log_offset = read_docstore_log(docstore_log_offset, max(index.ntotal - start, 0))
+            vector_store.docstore.add({
+                entry["id"]: Document(id=entry["id"], page_content=entry["text"], metadata=entry["metadata"])
+                for entry in indexed
+            })
+            vector_store.index_to_docstore_id.update({start + j: entry["id"] for j, entry in enumerate(indexed)})
+            vector_store.index = index
+            vector_store.distance_strategy = distance_strategy_for(index)
+            loaded_index_generation, index_is_mmap = generation, mmap
+            
+            # Writable copies also index chunks logged after the last flush
+            if not mmap:
+                reindex_pending_chunks()
+            logger.info(f"✅ Loaded {vector_store.index.ntotal} documents from disk")
+        elif os.path.exists(os.path.join(INDEX_DIR, "index.pkl")):
+            # Pickled save_local format from earlier versions - migrate to the log
+            logger.info("📂 Loading existing FAISS index...")
+            vector_store = FAISS.load_local(INDEX_DIR, embeddings, allow_dangerous_deserialization=True)
+            vector_store.distance_strategy = distance_strategy_for(vector_store.index)
+            
+            ids = [vector_store.index_to_docstore_id[i] for i in range(vector_store.index.ntotal)]
+            docs = [vector_store.docstore.search(id_) for id_ in ids]
+            append_to_docstore_log(ids, [doc.page_content for doc in docs], [doc.metadata for doc in docs])
+            loaded_index_generation, docstore_log_offset = latest_index_generation(), os.path.getsize(DOCSTORE_LOG_PATH)
             logger.info(f"✅ Loaded {vector_store.index.ntotal} documents from disk")
         else:
             logger.info("🆕 No existing index found - starting fresh")
     except Exception as e:
         logger.error(f"❌ Failed to load FAISS index: {str(e)}")
 
-# Load on startup
-load_vector_store()
+def reindex_pending_chunks():
+    """Embed and index docstore log entries that never made it into a saved index"""
+    global docstore_log_offset
+    pending, offset = read_docstore_log(docstore_log_offset)
+    if not pending:
+        return
+    logger.info(f"🔁 Re-indexing {len(pending)} chunks logged after the last save...")
+    texts = [entry["text"] for entry in pending]
+    index_vectors(
+        [entry["id"] for entry in pending],
+        texts,
+        embeddings.encode(texts),
+        [entry["metadata"] for entry in pending]
+    )
+    docstore_log_offset = offset  # Only once indexed, so a failure retries these entries
+    save_vector_store()
+
+def refresh_vector_store(writable: bool = False):
+    """Reload the index if another worker wrote a newer one, or a writable copy is needed"""
+    if latest_index_generation() != loaded_index_generation or (writable and index_is_mmap):
+        load_vector_store(mmap=MMAP_INDEX and not writable)
+
+def remap_vector_store():
+    """Go back to the read-only mapped snapshot so this worker shares its pages with the others"""
+    if MMAP_INDEX and vector_store is not None and not index_is_mmap:
+        load_vector_store(mmap=True)
+
+def add_to_shared_vector_store(texts: List[str], vectors: np.ndarray, metadatas: List[dict]):
+    """Single-writer ingest across processes: sync from disk and the log, add, then flush when shared"""
+    with writer_lock:
+        refresh_vector_store(writable=True)
+        if vector_store is not None:
+            reindex_pending_chunks()  # Keep log lines aligned with index rows
+        add_to_vector_store(texts, vectors, metadatas)
+        if SHARED_INDEX:
+            save_vector_store()
+            remap_vector_store()
+
+def swap_in_shared_compressed_index(ivfpq, snapshot_rows: int):
+    """Swap a compressed index into the up-to-date writable copy and flush it for other workers"""
+    with writer_lock:
+        refresh_vector_store(writable=True)
+        reindex_pending_chunks()
+        if swap_in_compressed_index(ivfpq, snapshot_rows):
+            save_vector_store()
+        remap_vector_store()
+
+compress_task: Optional[asyncio.Task] = None
+
+async def compress_vector_store():
+    """Rebuild the index as IVF+PQ without blocking ingest and chat for the build"""
+    try:
+        async with vector_store_lock:
+            index = vector_store.index
+            if not needs_compression(index):
+                return
+            snapshot_rows = index.ntotal
+            xb = await run_in_threadpool(index.reconstruct_n, 0, snapshot_rows)
+        
+        # Training and encoding dominate, so run them outside the lock
+        ivfpq = await run_in_threadpool(build_ivfpq_index, xb)
+        
+        async with vector_store_lock:
+            if SHARED_INDEX:
+                await run_in_threadpool(swap_in_shared_compressed_index, ivfpq, snapshot_rows)
+            elif await run_in_threadpool(swap_in_compressed_index, ivfpq, snapshot_rows):
+                schedule_save()
+        logger.info("✅ IVF+PQ index built")
+    except Exception as e:
+        logger.error(f"❌ Index compression failed: {str(e)}")
+
+def schedule_compression():
+    """Start a background compression if the index needs one and none is running"""
+    global compress_task
+    if vector_store is None or not needs_compression(vector_store.index):
+        return
+    if compress_task is None or compress_task.done():
+        compress_task = asyncio.create_task(compress_vector_store())
+
+rerank_tuned_rows = 0  # Indexed chunks when the rerank cap was last measured
+
+def rerank_length_stale() -> bool:
+    """True once the corpus has grown enough since the cap was last measured"""
+    if ranker is None or vector_store is None or not vector_store.index_to_docstore_id:
+        return False
+    return len(vector_store.index_to_docstore_id) >= max(1, rerank_tuned_rows * RERANK_RETUNE_GROWTH)
+
+def tune_rerank_max_length():
+    """Cap FlashRank truncation at the 99th-percentile token length of indexed chunks (caller holds vector_store_lock)"""
+    global rerank_tuned_rows
+    ids = list(vector_store.index_to_docstore_id.values())
+    step = -(-len(ids) // RERANK_LENGTH_SAMPLE)  # Ceiling division keeps the sample within bounds
+    texts = [vector_store.docstore.search(id_).page_content for id_ in ids[::step]]
+    
+    # Measure on an untruncated copy; padding is on, so count real tokens via the mask.
+    # Reranks in other threads keep using the live tokenizer until the swap below.
+    tokenizer = Tokenizer.from_str(ranker.tokenizer.to_str())
+    tokenizer.no_truncation()
+    lengths = [sum(encoding.attention_mask) for encoding in tokenizer.encode_batch(texts)]
+    max_length = min(RERANK_MODEL_MAX_LENGTH, int(np.percentile(lengths, 99)) + RERANK_QUERY_TOKENS)
+    tokenizer.enable_truncation(max_length=max_length)
+    ranker.tokenizer, ranker.max_length = tokenizer, max_length
+    rerank_tuned_rows = len(ids)
+    logger.info(f"📏 Re-rank max length set to {max_length} tokens (p99 of {len(texts)} chunks)")
 
 # 5. Gemini Configuration
+SYSTEM_PROMPT = """You are VeriSearch, an intelligent assistant that answers questions based on company documents.
+
+Instructions:
+1. Answer based ONLY on the provided context
+2. If the context doesn't contain the answer, say so clearly
+3. Cite specific documents or pages when possible
+4. Be concise but comprehensive
+5. Use formatting (bullet points, bold) for clarity"""
+
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 if GEMINI_API_KEY:
     genai.configure(api_key=GEMINI_API_KEY)
+    # Built once with the static instructions; each turn only sends context/history/query (User confirmed 2.5)
+    GEMINI_MODEL = genai.GenerativeModel('gemini-2.5-flash', system_instruction=SYSTEM_PROMPT)
     logger.info("✅ Gemini API configured")
 else:
+    GEMINI_MODEL = None
     logger.warning("⚠️ No GEMINI_API_KEY found - will return mock responses")
 
 # Pydantic Models
@@ -175,71 +762,90 @@ class Citation(BaseModel):
 
 # Helper Functions
 
+pdfium_lock = threading.Lock()  # PDFium is not thread-safe; parsers run in the threadpool
+
 def parse_pdf_file(file_content: bytes, filename: str) -> List[Document]:
     """Parse PDF and extract text with page numbers"""
     documents = []
     try:
-        pdf_reader = PdfReader(io.BytesIO(file_content))
-        for page_num, page in enumerate(pdf_reader.pages, start=1):
-            text = page.extract_text()
-            if text.strip():
-                documents.append(Document(
-                    page_content=text,
-                    metadata={
-                        "filename": filename,
-                        "page": page_num,
-                        "type": "pdf",
-                        "source": f"{filename} - Page {page_num}"
-                    }
-                ))
+        with pdfium_lock:
+            pdf = pdfium.PdfDocument(file_content)
+            try:
+                for page_num, page in enumerate(pdf, start=1):
+                    textpage = page.get_textpage()
+                    # PDFium emits CRLF line breaks and U+FFFE soft-hyphen markers; match pypdf's plain text
+                    text = textpage.get_text_range().replace("\r\n", "\n").replace("\r", "\n").replace("\ufffe", "")
+                    textpage.close()
+                    page.close()
+                    
+                    if text.strip():
+                        documents.append(Document(
+                            page_content=text,
+                            metadata={
+                                "filename": filename,
+                                "page": page_num,
+                                "type": "pdf",
+                                "source": f"{filename} - Page {page_num}"
+                            }
+                        ))
+            finally:
+                pdf.close()
         logger.info(f"📄 Parsed PDF: {len(documents)} pages")
     except Exception as e:
         logger.error(f"❌ PDF parsing failed: {str(e)}")
         raise
     return documents
 
+def format_rows(df: pd.DataFrame, prefix: str = "") -> List[str]:
+    """Render every DataFrame row as 'column: value' lines, skipping empty cells"""
+    columns = [str(col) for col in df.columns]
+    # One vectorized null mask instead of a pd.notna call per cell
+    rows = df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+    return [
+        f"{prefix}Row {row_num}\n" + "\n".join(f"{col}: {val}" for col, val in zip(columns, values) if val is not None)
+        for row_num, values in enumerate(rows, start=2)  # +2 for header and 0-indexing
+    ]
+
 def parse_excel_file(file_content: bytes, filename: str) -> List[Document]:
     """Parse Excel/CSV and convert rows to searchable text"""
     documents = []
     try:
         # Try Excel first
-        excel_file = pd.ExcelFile(io.BytesIO(file_content))
+        excel_file = pd.ExcelFile(io.BytesIO(file_content), engine=EXCEL_ENGINE)
         for sheet_name in excel_file.sheet_names:
-            df = pd.read_excel(excel_file, sheet_name=sheet_name)
+            df = excel_file.parse(sheet_name)
             
             # Convert each row to a document
-            for idx, row in df.iterrows():
-                row_text = f"Sheet: {sheet_name}, Row {idx + 2}\n"  # +2 for header and 0-indexing
-                row_text += "\n".join([f"{col}: {val}" for col, val in row.items() if pd.notna(val)])
-                
-                documents.append(Document(
+            documents.extend(
+                Document(
                     page_content=row_text,
                     metadata={
                         "filename": filename,
                         "sheet": sheet_name,
-                        "row": idx + 2,
+                        "row": row_num,
                         "type": "excel",
-                        "source": f"{filename} - {sheet_name} Row {idx + 2}"
+                        "source": f"{filename} - {sheet_name} Row {row_num}"
                     }
-                ))
+                )
+                for row_num, row_text in enumerate(format_rows(df, f"Sheet: {sheet_name}, "), start=2)
+            )
         logger.info(f"📊 Parsed Excel: {len(documents)} rows from {len(excel_file.sheet_names)} sheets")
     except Exception as e:
         # If Excel fails, try CSV
         try:
             df = pd.read_csv(io.BytesIO(file_content))
-            for idx, row in df.iterrows():
-                row_text = f"Row {idx + 2}\n"
-                row_text += "\n".join([f"{col}: {val}" for col, val in row.items() if pd.notna(val)])
-                
-                documents.append(Document(
+            documents = [
+                Document(
                     page_content=row_text,
                     metadata={
                         "filename": filename,
-                        "row": idx + 2,
+                        "row": row_num,
                         "type": "csv",
-                        "source": f"{filename} - Row {idx + 2}"
+                        "source": f"{filename} - Row {row_num}"
                     }
-                ))
+                )
+                for row_num, row_text in enumerate(format_rows(df), start=2)
+            ]
             logger.info(f"📊 Parsed CSV: {len(documents)} rows")
         except Exception as csv_error:
             logger.error(f"❌ Excel/CSV parsing failed: {str(csv_error)}")
@@ -247,23 +853,23 @@ def parse_excel_file(file_content: bytes, filename: str) -> List[Document]:
     
     return documents
 
-def parse_powerpoint_file(file_path: str, filename: str) -> List[Document]:
+def parse_powerpoint_file(file_content: bytes, filename: str) -> List[Document]:
     """Parse PowerPoint and extract slide content"""
     documents = []
     try:
-        loader = UnstructuredPowerPointLoader(file_path)
-        raw_docs = loader.load()
-        
-        for idx, doc in enumerate(raw_docs, start=1):
-            documents.append(Document(
-                page_content=doc.page_content,
-                metadata={
-                    "filename": filename,
-                    "slide": idx,
-                    "type": "pptx",
-                    "source": f"{filename} - Slide {idx}"
-                }
-            ))
+        presentation = Presentation(io.BytesIO(file_content))
+        for idx, slide in enumerate(presentation.slides, start=1):
+            text = "\n".join(shape.text_frame.text for shape in slide.shapes if shape.has_text_frame)
+            if text.strip():
+                documents.append(Document(
+                    page_content=text,
+                    metadata={
+                        "filename": filename,
+                        "slide": idx,
+                        "type": "pptx",
+                        "source": f"{filename} - Slide {idx}"
+                    }
+                ))
         logger.info(f"📽️ Parsed PowerPoint: {len(documents)} slides")
     except Exception as e:
         logger.error(f"❌ PowerPoint parsing failed: {str(e)}")
@@ -271,6 +877,80 @@ def parse_powerpoint_file(file_path: str, filename: str) -> List[Document]:
     
     return documents
 
+def split_into_chunks(documents: List[Document], doc_id: str) -> List[Document]:
+    """Split parsed sections into chunks tagged with doc_id"""
+    all_chunks = []
+    for doc in documents:
+        # One shallow-copied metadata dict per section instead of a deepcopy per chunk
+        metadata = {**doc.metadata, "doc_id": doc_id}
+        all_chunks.extend(
+            Document(page_content=text, metadata=metadata)
+            for text in text_splitter.split_text(doc.page_content)
+        )
+    return all_chunks
+
+
+QUERY_CACHE_SIZE = 4096
+RERANK_CACHE_SIZE = 1024
+RERANK_SPLIT_MIN = 20  # Candidate count at which reranking is split into short/long batches
+
+@functools.lru_cache(maxsize=QUERY_CACHE_SIZE)
+def embed_query_cached(query: str) -> np.ndarray:
+    """Embed a chat query once; repeated questions reuse the vector"""
+    vector = np.asarray(embeddings.embed_query(query), dtype=np.float32)
+    vector.setflags(write=False)  # Shared between callers
+    return vector
+
+# (query, chunk ids) -> reranked positions. Scores depend only on the query and
+# passage texts, so entries stay valid when new documents are ingested.
+rerank_cache: "OrderedDict[tuple, List[int]]" = OrderedDict()
+rerank_cache_lock = threading.Lock()  # Reranks run concurrently in the threadpool
+
+def search_vector_store(query_vector: np.ndarray) -> List[Document]:
+    """Top RETRIEVAL_K chunks for a query vector (caller holds vector_store_lock)"""
+    configure_search(vector_store.index)
+    return vector_store.similarity_search_by_vector(query_vector, k=RETRIEVAL_K)
+
+def rerank_cached(query: str, retrieved_docs: List[Document]) -> List[int]:
+    """Return positions of retrieved_docs ordered by FlashRank score, memoized"""
+    key = (query, tuple(getattr(doc, 'id', None) or doc.page_content for doc in retrieved_docs))
+    with rerank_cache_lock:
+        if key in rerank_cache:
+            rerank_cache.move_to_end(key)
+            return rerank_cache[key]
+    
+    # Prepare passages for re-ranking (id maps results back to retrieved_docs)
+    passages = [{"id": i, "text": doc.page_content} for i, doc in enumerate(retrieved_docs)]
+    
+    # FlashRank pads every pair to the longest in the call, so sort by length and
+    # score short and long passages separately. Scores are per-pair sigmoids and
+    # stay comparable across calls.
+    passages.sort(key=lambda passage: len(passage["text"]))
+    if len(passages) >= RERANK_SPLIT_MIN:
+        mid = len(passages) // 2
+        buckets = [passages[:mid], passages[mid:]]
+    else:
+        buckets = [passages]
+    
+    reranked_results = []
+    for bucket in buckets:
+        reranked_results.extend(ranker.rerank(RerankRequest(query=query, passages=bucket)))
+    reranked_results.sort(key=lambda result: result['score'], reverse=True)
+    order = [result['id'] for result in reranked_results]
+    
+    with rerank_cache_lock:
+        rerank_cache[key] = order
+        if len(rerank_cache) > RERANK_CACHE_SIZE:
+            rerank_cache.popitem(last=False)
+    return order
+
+MOCK_STREAM_CHUNK_SIZE = 20  # Characters per mock SSE event
+
+def sse_event(payload: dict) -> bytes:
+    """Serialize a payload as a single Server-Sent Event"""
+    return b"data: " + orjson.dumps(payload) + b"\n\n"
+
+SSE_DONE = sse_event({'type': 'done'})  # Constant, so serialize once
 
 def safe_get_chunk_text(chunk) -> str:
     """Safely get text from Gemini response chunk, handling safety blocks"""
@@ -280,16 +960,16 @@ def safe_get_chunk_text(chunk) -> str:
         # Safety filter blocked or no text in chunk
         return ""
 
-async def generate_streaming_response(query: str, context: str, history: List[ChatMessage]) -> AsyncGenerator[str, None]:
+async def generate_streaming_response(query: str, context: str, history: List[ChatMessage]) -> AsyncGenerator[bytes, None]:
     """Generate streaming response using Gemini"""
     
     if not GEMINI_API_KEY:
         # Mock streaming response for demo
         mock_response = "Based on the retrieved documents, I can provide information about your query. However, no API key is configured, so this is a mock response for demonstration purposes."
-        for char in mock_response:
-            yield f"data: {json.dumps({'type': 'content', 'data': char})}\n\n"
-            await asyncio.sleep(0.01)
-        yield f"data: {json.dumps({'type': 'done'})}\n\n"
+        for i in range(0, len(mock_response), MOCK_STREAM_CHUNK_SIZE):
+            yield sse_event({'type': 'content', 'data': mock_response[i:i + MOCK_STREAM_CHUNK_SIZE]})
+            await asyncio.sleep(0.02)
+        yield SSE_DONE
         return
     
     try:
@@ -299,57 +979,42 @@ async def generate_streaming_response(query: str, context: str, history: List[Ch
             for msg in history[-5:]:  # Last 5 messages for context
                 history_text += f"{msg.role.upper()}: {msg.content}\n\n"
         
-        # Build prompt
-        prompt = f"""You are VeriSearch, an intelligent assistant that answers questions based on company documents.
-
-CONTEXT FROM DOCUMENTS:
+        history_block = f"CONVERSATION HISTORY:\n{history_text}\n" if history_text else ""
+        
+        # Build prompt (instructions live in GEMINI_MODEL's system_instruction)
+        prompt = f"""CONTEXT FROM DOCUMENTS:
 {context}
 
-{f"CONVERSATION HISTORY:\n{history_text}" if history_text else ""}
-
-USER QUESTION: {query}
-
-Instructions:
-1. Answer based ONLY on the provided context
-2. If the context doesn't contain the answer, say so clearly
-3. Cite specific documents or pages when possible
-4. Be concise but comprehensive
-5. Use formatting (bullet points, bold) for clarity
+{history_block}USER QUESTION: {query}
 
 ANSWER:"""
-
-
-        # Initialize Gemini model (User confirmed 2.5)
-        model = genai.GenerativeModel('gemini-2.5-flash')
         
         # Stream response
         logger.info("🌟 Streaming from Gemini...")
         logger.info(f"📝 PROMPT GENERATED:\n{prompt}\n-------------------")
-        response = model.generate_content(prompt, stream=True)
+        # Async streaming keeps the event loop free instead of blocking on the sync iterator
+        response = await GEMINI_MODEL.generate_content_async(prompt, stream=True)
         
         has_content = False
-        for chunk in response:
-            try:
-                print(f"DEBUG CHUNK: {chunk.text[:20] if hasattr(chunk, 'text') else 'No Text'}")
-            except:
-                print("DEBUG CHUNK: Error accessing text")
-            
+        async for chunk in response:
             text = safe_get_chunk_text(chunk)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Gemini chunk: {text[:20]!r}")
             if text:
                 has_content = True
-                yield f"data: {json.dumps({'type': 'content', 'data': text})}\n\n"
+                yield sse_event({'type': 'content', 'data': text})
         
         if not has_content:
             msg = "Response blocked. Try different question."
-            yield f"data: {json.dumps({'type': 'content', 'data': msg})}\n\n"
+            yield sse_event({'type': 'content', 'data': msg})
          
-        yield f"data: {json.dumps({'type': 'done'})}\\n\\n"
+        yield SSE_DONE
         logger.info("✅ Streaming completed")
         
     except Exception as e:
         logger.error(f"❌ Streaming error: {str(e)}")
         error_msg = f"Error generating response: {str(e)}"
-        yield f"data: {json.dumps({'type': 'error', 'data': error_msg})}\n\n"
+        yield sse_event({'type': 'error', 'data': error_msg})
 
 # API Endpoints
 
@@ -357,6 +1022,9 @@ ANSWER:"""
 async def health_check():
     """Health check endpoint"""
     global vector_store
+    if SHARED_INDEX:
+        async with vector_store_lock:
+            await run_in_threadpool(refresh_vector_store)
     return {
         "status": "healthy",
         "service": "VeriSearch RAG API",
@@ -398,19 +1066,15 @@ async def ingest_document(file: UploadFile = File(...)):
         # Parse based on file type
         documents = []
         
+        # Parsers are CPU-bound, so keep them off the event loop
         if filename.lower().endswith('.pdf'):
-            documents = parse_pdf_file(file_content, filename)
+            documents = await run_in_threadpool(parse_pdf_file, file_content, filename)
             
         elif filename.lower().endswith(('.xlsx', '.xls', '.csv')):
-            documents = parse_excel_file(file_content, filename)
+            documents = await run_in_threadpool(parse_excel_file, file_content, filename)
             
         elif filename.lower().endswith('.pptx'):
-            # Save temporarily for UnstructuredPowerPointLoader
-            temp_path = f"/tmp/{filename}"
-            with open(temp_path, 'wb') as f:
-                f.write(file_content)
-            documents = parse_powerpoint_file(temp_path, filename)
-            os.remove(temp_path)
+            documents = await run_in_threadpool(parse_powerpoint_file, file_content, filename)
             
         elif filename.lower().endswith('.txt'):
             text = file_content.decode('utf-8')
@@ -430,30 +1094,26 @@ async def ingest_document(file: UploadFile = File(...)):
         
         logger.info(f"✅ Parsed {len(documents)} document sections")
         
+        # Generate unique doc ID
+        doc_id = str(uuid.uuid4())
+        
         # Split into chunks
-        all_chunks = []
-        for doc in documents:
-            chunks = text_splitter.split_documents([doc])
-            all_chunks.extend(chunks)
+        all_chunks = await run_in_threadpool(split_into_chunks, documents, doc_id)
         
         logger.info(f"✂️ Created {len(all_chunks)} chunks")
         
-        # Generate unique doc ID
-        doc_id = str(uuid.uuid4())
-        
-        # Add doc_id to metadata
-        for chunk in all_chunks:
-            chunk.metadata["doc_id"] = doc_id
+        # Embed every chunk in a single batched call (model inference releases the GIL)
+        texts = [chunk.page_content for chunk in all_chunks]
+        vectors = await run_in_threadpool(embeddings.encode, texts)
         
         # Create or update FAISS vector store
-        if vector_store is None:
-            logger.info("🔨 Creating new FAISS index...")
-            vector_store = FAISS.from_documents(all_chunks, embeddings)
-        else:
-            logger.info("➕ Adding to existing FAISS index...")
-            vector_store.add_documents(all_chunks)
-        
-        total_docs = vector_store.index.ntotal
+        metadatas = [chunk.metadata for chunk in all_chunks]
+        async with vector_store_lock:
+            await run_in_threadpool(add_to_shared_vector_store, texts, vectors, metadatas)
+            total_docs = vector_store.index.ntotal
+        if not SHARED_INDEX:
+            schedule_save()
+        schedule_compression()
         logger.info(f"💾 Vector store now contains {total_docs} chunks")
         logger.info(f"✅ Successfully ingested {filename}")
         
@@ -470,9 +1130,27 @@ async def ingest_document(file: UploadFile = File(...)):
     except Exception as e:
         logger.error(f"❌ Ingestion failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Ingestion failed: {str(e)}")
-    finally:
-        # Always save after modification
-        save_vector_store()
+
+def initialize_components():
+    """Load models and the index in each worker, not in the `python main.py` supervisor"""
+    global embeddings, ranker
+    logger.info("🚀 Initializing RAG components...")
+    embeddings = load_embeddings()
+    if FLASHRANK_AVAILABLE:
+        ranker = load_ranker()
+    
+    # Take the writer lock so only one process re-indexes pending chunks, then map the result
+    with writer_lock:
+        load_vector_store()
+    remap_vector_store()
+    if rerank_length_stale():
+        tune_rerank_max_length()
+
+async def flush_on_shutdown():
+    """Persist any index changes still waiting on the debounce window"""
+    if index_dirty:
+        async with vector_store_lock:
+            await run_in_threadpool(flush_to_disk)
 
 @app.post("/chat")
 async def chat_stream(request: ChatRequest):
@@ -480,7 +1158,7 @@ async def chat_stream(request: ChatRequest):
     RAG Chat with Hybrid Search & Streaming
     
     Process:
-    1. Retrieve top 10 chunks from FAISS
+    1. Retrieve top 50 chunks from FAISS
     2. Re-rank with FlashRank to top 5
     3. Generate streaming response with Gemini
     """
@@ -490,14 +1168,19 @@ async def chat_stream(request: ChatRequest):
         query = request.message
         logger.info(f"💬 Chat query: '{query[:100]}...'")
         
+        # Pick up documents ingested by other workers
+        if SHARED_INDEX:
+            async with vector_store_lock:
+                await run_in_threadpool(refresh_vector_store)
+        
         # Check if documents are indexed
         if vector_store is None or vector_store.index.ntotal == 0:
             logger.warning("⚠️ No documents indexed")
             
             async def no_docs_response():
                 msg = "No documents have been indexed yet. Please upload documents first using the Knowledge Base section."
-                yield f"data: {json.dumps({'type': 'content', 'data': msg})}\n\n"
-                yield f"data: {json.dumps({'type': 'done'})}\n\n"
+                yield sse_event({'type': 'content', 'data': msg})
+                yield SSE_DONE
             
             return StreamingResponse(
                 no_docs_response(),
@@ -509,28 +1192,29 @@ async def chat_stream(request: ChatRequest):
                 }
             )
         
-        # Step 1: FAISS Vector Search (Top 10)
+        # Step 1: FAISS Vector Search (Top 50)
         logger.info(f"🔍 Searching {vector_store.index.ntotal} chunks in FAISS...")
-        retrieved_docs = vector_store.similarity_search(query, k=10)
+        # Embedding, search and rerank are CPU-bound, so keep them off the event loop
+        query_vector = await run_in_threadpool(embed_query_cached, query)
+        async with vector_store_lock:
+            retrieved_docs = await run_in_threadpool(search_vector_store, query_vector)
+            # Servers that start empty get their cap once documents arrive, then as the corpus grows
+            if rerank_length_stale():
+                await run_in_threadpool(tune_rerank_max_length)
         logger.info(f"📚 Retrieved {len(retrieved_docs)} chunks from FAISS")
         
         # Step 2: FlashRank Re-Ranking (Top 5)
         if FLASHRANK_AVAILABLE and ranker and len(retrieved_docs) > 0:
             logger.info("🎯 Re-ranking with FlashRank...")
             
-            # Prepare passages for re-ranking
-            passages = [{"text": doc.page_content} for doc in retrieved_docs]
-            rerank_request = RerankRequest(query=query, passages=passages)
-            reranked_results = ranker.rerank(rerank_request)
-            
             # Get top 5 after re-ranking
-            top_indices = [result['corpus_id'] for result in reranked_results[:5]]
+            top_indices = (await run_in_threadpool(rerank_cached, query, retrieved_docs))[:RERANK_TOP_N]
             final_docs = [retrieved_docs[i] for i in top_indices]
             
             logger.info(f"✅ Re-ranked to top {len(final_docs)} chunks")
         else:
             # No re-ranking, just take top 5
-            final_docs = retrieved_docs[:5]
+            final_docs = retrieved_docs[:RERANK_TOP_N]
         
         # Build context from top chunks
         context = "\n\n---\n\n".join([
@@ -560,4 +1244,6 @@ if __name__ == "__main__":
     logger.info("🚀 Starting VeriSearch RAG API...")
     logger.info("📍 Server: http://localhost:8000")
     logger.info("📖 Docs: http://localhost:8000/docs")
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    logger.info(f"⚙️ Workers: {WORKERS} (set WEB_CONCURRENCY to change)")
+    # Import string so each worker process loads the app (and its models) itself
+    uvicorn.run("main:app", host="0.0.0.0", port=8000, workers=WORKERS)